@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from io import StringIO
+
+import pandas as pd
+
+
+class FileCache:
+    """
+    Persistent JSON cache for DataFrames fetched from remote APIs.
+
+    Entries are stored as .cache/{symbol}/{endpoint}-{md5 of the request args}.json
+    and hold the write time plus the DataFrame serialized with to_json(orient='split'),
+    so data fetched in one session is reused after the app restarts.
+    """
+
+    def __init__(self, cache_dir=".cache", ttl=86400):
+        """
+        Args:
+            cache_dir (str): Directory the cache files are written to.
+            ttl (int): Seconds an entry stays valid.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _path(self, symbol, endpoint, args):
+        key = hashlib.md5(repr(args).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, symbol, f"{endpoint}-{key}.json")
+
+    def get(self, symbol, endpoint, *args, ttl=None):
+        """
+        Returns the cached DataFrame, or None if it is missing, expired or unreadable.
+
+        Args:
+            symbol (str): The stock symbol (or another namespace, e.g. 'worldbank').
+            endpoint (str): Name of the data being cached (e.g. 'history').
+            *args: Request arguments that distinguish entries for the same endpoint.
+            ttl (int): Seconds the entry stays valid; defaults to the cache's ttl.
+
+        Returns:
+            pandas.DataFrame: The cached data, or None.
+        """
+        path = self._path(symbol, endpoint, args)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["ts"] >= (self.ttl if ttl is None else ttl):
+                return None
+            return pd.read_json(StringIO(entry["data"]), orient="split", dtype=False)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Ignoring unreadable cache file %s: %s", path, e)
+            return None
+
+    def set(self, symbol, endpoint, df, *args):
+        """
+        Stores a DataFrame, replacing any previous entry for the same key.
+
+        Args:
+            symbol (str): The stock symbol (or another namespace).
+            endpoint (str): Name of the data being cached.
+            df (pandas.DataFrame): The data to store.
+            *args: Request arguments that distinguish entries for the same endpoint.
+        """
+        path = self._path(symbol, endpoint, args)
+        entry = {"ts": time.time(), "data": df.to_json(orient="split", date_format="iso", double_precision=15)}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so a concurrent reader never sees half a file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning("Could not write cache file %s: %s", path, e)
+
+    def get_or_fetch(self, symbol, endpoint, fetch, *args, ttl=None):
+        """
+        Returns the cached DataFrame, calling `fetch` and storing its result on a miss.
+
+        Empty or missing results are returned but not stored, so a failed fetch is
+        retried on the next call.
+
+        Args:
+            symbol (str): The stock symbol (or another namespace).
+            endpoint (str): Name of the data being cached.
+            fetch (callable): Zero-argument function that downloads the DataFrame.
+            *args: Request arguments that distinguish entries for the same endpoint.
+            ttl (int): Seconds a cached entry stays valid; defaults to the cache's ttl.
+
+        Returns:
+            pandas.DataFrame: The cached or freshly fetched data (may be None).
+        """
+        df = self.get(symbol, endpoint, *args, ttl=ttl)
+        if df is not None:
+            return df
+        df = fetch()
+        if df is not None and not df.empty:
+            self.set(symbol, endpoint, df, *args)
+        return df
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from cache import FileCache
+from indicators import moving_averages, rsi
+
+# yfinance responses are cached on disk for a day (see cache.py), so restarts reuse them.
+# Financial statements only change quarterly, so they are kept for 90 days.
+# yfinance itself is imported where it is used, which keeps its import cost off startup.
+FILE_CACHE = FileCache()
+FINANCIALS_TTL = 90 * 24 * 3600
+
+
+def _to_utc_index(index):
+    """Returns the index as a UTC DatetimeIndex, whether it is naive or tz-aware."""
+    return pd.to_datetime(index, utc=True)
+
+
+def _since(series, cutoff):
+    """Returns the rows of a UTC-indexed series from the UTC cutoff timestamp on, in date order."""
+    # Statements arrive newest first; once sorted, a binary search finds the cut without a boolean mask
+    series = series.sort_index()
+    return series.iloc[series.index.searchsorted(cutoff):]
+
+
+# Cache downloads so reruns with the same inputs skip the network
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_stock_data(ticker, start_date):
+    """Downloads stock data from yfinance and calculates moving averages and RSI."""
+    import yfinance as yf
+    stock_data = FILE_CACHE.get_or_fetch(
+        ticker,
+        "daily_history",
+        lambda: yf.download(
+            ticker, start=start_date, progress=False, auto_adjust=True, multi_level_index=False
+        ),
+        start_date,
+    )
+    # Failures raise rather than return None: st.cache_data doesn't keep exceptions, so the
+    # next run retries instead of serving the error for an hour. The caller reports them.
+    if stock_data.empty:
+        raise ValueError(f"No data found for {ticker} from {start_date}")
+    # Both averages come from one cumulative sum over the raw Close array
+    stock_data["50_MA"], stock_data["200_MA"] = moving_averages(stock_data["Close"].to_numpy(), (50, 200))
+    stock_data["RSI"] = rsi(stock_data["Close"].to_numpy())
+    # Indicators are computed in float64 above; float32 is plenty for storing and plotting
+    # them and halves what the cache keeps and what the charts copy
+    price_columns = ["Open", "High", "Low", "Close", "50_MA", "200_MA", "RSI"]
+    stock_data[price_columns] = stock_data[price_columns].astype(np.float32)
+    return stock_data
+
+
+# A Ticker memoizes what it fetches, so expire it together with the cached statements
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _get_ticker(ticker):
+    """Returns one shared yf.Ticker per symbol for the financials, dividends and cash flow lookups."""
+    import yfinance as yf
+    return yf.Ticker(ticker)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_financials(ticker):
+    """Downloads the annual income statement from yfinance."""
+    return FILE_CACHE.get_or_fetch(ticker, "income_stmt", lambda: _get_ticker(ticker).financials, ttl=FINANCIALS_TTL)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_dividends(ticker):
+    """Downloads the dividend history from yfinance."""
+    dividends = FILE_CACHE.get_or_fetch(ticker, "dividends", lambda: _get_ticker(ticker).dividends.to_frame())
+    return dividends.squeeze("columns")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_cashflow(ticker):
+    """Downloads the annual cash flow statement from yfinance."""
+    return FILE_CACHE.get_or_fetch(ticker, "cashflow", lambda: _get_ticker(ticker).cashflow, ttl=FINANCIALS_TTL)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_analysis_data(ticker, start_date):
+    """Returns the price history plus revenue, dividends and free cash flow since start_date."""
+    stock_data = get_stock_data(ticker, start_date)
+
+    # Get financial data
+    financials = get_financials(ticker)
+    dividends = get_dividends(ticker)
+    cashflow = get_cashflow(ticker)
+    # The statements are all cut at the same UTC start date, so build the timestamp once
+    cutoff = pd.Timestamp(start_date, tz="UTC")
+
+    # Helper function to process financial data
+    def process_financial_data(data):
+        if data is not None and not data.empty:
+            data.index = _to_utc_index(data.index)
+            return _since(data, cutoff)
+        return pd.Series()
+
+    # Get revenue data
+    revenue_data = pd.Series()
+    if financials is not None and "Total Revenue" in financials.index:
+        revenue_data = financials.loc["Total Revenue"]
+        revenue_data = process_financial_data(revenue_data)
+
+    # Get dividend data
+    dividends = process_financial_data(dividends)
+
+    # Get free cash flow data
+    fcf_data = pd.Series()
+    if cashflow is not None and "Free Cash Flow" in cashflow.index:
+        fcf_data = cashflow.loc["Free Cash Flow"]
+        fcf_data = process_financial_data(fcf_data)
+
+    return stock_data, revenue_data, dividends, fcf_data
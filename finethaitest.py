@@ -1,25 +1,59 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from cache import FileCache
+from indicators import lttb_indices, moving_averages, rsi
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
 import json
+try:
+    # orjson parses straight from bytes in C, several times faster than the stdlib
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 import logging
-import pytz # Import pytz
 import os # Import os to access environment variables
 
+# yfinance and plotly are imported inside the functions that use them, which keeps
+# their import cost off startup until a page actually needs them.
+
 # Configure logging
 logging.basicConfig(level=logging.ERROR) # Change to DEBUG for more detailed logs
 
 # World Bank API base URL
-WORLD_BANK_API_URL = "http://api.worldbank.org/v2/country/all/indicator/"
+WORLD_BANK_API_URL = "https://api.worldbank.org/v2/country/USA/indicator/"
+
+# World Bank responses are cached on disk for a day, so app restarts reuse them
+WORLD_BANK_SESSION = requests_cache.CachedSession('.worldbank_cache', backend='sqlite', expire_after=86400)
+# Keep a few connections alive per host so the GDP and inflation calls can share them
+WORLD_BANK_SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+WORLD_BANK_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# yfinance responses are cached on disk for a day as well (see cache.py). Financial
+# statements only change quarterly, so they are kept for 90 days.
+FILE_CACHE = FileCache()
+FINANCIALS_TTL = 90 * 24 * 3600
+# Revenue and free cash flow charts never reach back further than this
+MIN_FUNDAMENTALS_DATE = datetime(2000, 1, 1)
 
 # World Bank Series IDs
 GDP_SERIES_ID = "NY.GDP.MKTP.CD" # GDP (current US$)
 INFLATION_SERIES_ID = "FP.CPI.TOTL.ZG" # Inflation, consumer prices (annual %)
 
+# Date range buttons shown in the sidebar, in years
+_YEARS = (1, 5, 10, 20, 25)
+
+# Price charts with more rows than this are downsampled (LTTB) to _DOWNSAMPLED_POINTS
+_MAX_PLOT_POINTS = 2000
+_DOWNSAMPLED_POINTS = 1500
+
+# Columns kept from the yfinance price download
+_PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
 # Gemini API Configuration
 # In a deployed Streamlit app, you would set this as a secret or environment variable.
 # For Canvas, if the user provides a .env file, this might work.
@@ -31,6 +65,90 @@ if not API_KEY:
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
 
+def _add_indicators(df):
+    """
+    Adds the MA50, MA200 and RSI columns to a weekly price DataFrame.
+
+    Args:
+        df (pandas.DataFrame): Price data with a 'Close' column. Modified in place.
+
+    Returns:
+        pandas.DataFrame: The same DataFrame, for chaining.
+    """
+    # Pull Close out once and do all the indicator math on the raw array
+    close = df['Close'].to_numpy()
+    ma50, ma200 = moving_averages(close, (50, 200))  # both windows share one cumulative sum
+    df[['MA50', 'MA200', 'RSI']] = np.column_stack((ma50, ma200, rsi(close)))
+
+    # float32 is plenty for weekly prices and indicators, and halves both the
+    # DataFrame's memory and the arrays plotly serializes for the browser
+    price_columns = _PRICE_COLUMNS + ['MA50', 'MA200', 'RSI']
+    df[price_columns] = df[price_columns].astype(np.float32)
+    return df
+
+
+def _to_datetime_index(index, utc=False):
+    """
+    Returns the index as a DatetimeIndex, parsing it only when it isn't one already.
+
+    Args:
+        index (pandas.Index): The index to convert (e.g. statement dates from yfinance).
+        utc (bool): Whether to return a UTC-aware index.
+
+    Returns:
+        pandas.DatetimeIndex: The converted index.
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        if not utc:
+            return index
+        return index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    return pd.to_datetime(index, cache=True, utc=utc)
+
+
+class FetchError(Exception):
+    """
+    Raised by the cached fetchers when data can't be fetched. st.cache_data doesn't
+    keep exceptions, so the next run retries instead of showing the error for an hour.
+    """
+
+
+def _fetch(fetcher, *args):
+    """
+    Calls a cached fetcher from main()'s thread pool.
+
+    Args:
+        fetcher (callable): The cached fetcher, e.g. get_stock_data.
+        *args: The fetcher's arguments.
+
+    Returns:
+        tuple: The fetched data (None on failure) and the error message to show
+               (None if there is nothing to report).
+    """
+    try:
+        return fetcher(*args), None
+    except FetchError as e:
+        return None, str(e)
+
+
+# A Ticker memoizes what it fetches, so expire it together with the cached data
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _get_ticker(symbol):
+    """
+    Returns a shared yf.Ticker for the symbol, so revenue, dividend and cash flow
+    lookups reuse one object (and its already-fetched data) instead of building three.
+
+    Args:
+        symbol (str): The stock symbol (e.g., 'AAPL').
+
+    Returns:
+        yfinance.Ticker: The shared Ticker object (rebuilt after an hour).
+    """
+    import yfinance as yf
+    return yf.Ticker(symbol)
+
+
+# Cache fetched data in memory so reruns with the same arguments skip the network
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_stock_data(symbol, start_date, end_date):
     """
     Fetches stock data from yfinance and calculates moving averages.
@@ -41,38 +159,84 @@ def get_stock_data(symbol, start_date, end_date):
         end_date (datetime): The end date for the data.
 
     Returns:
-        pandas.DataFrame: A DataFrame containing the stock data,
-                          or None if an error occurs.
+        pandas.DataFrame: A DataFrame containing the stock data.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
+    import yfinance as yf
     try:
-        logging.info(f"Fetching stock data for {symbol} from {start_date} to {end_date}")
-        stock = yf.Ticker(symbol)
-        df = stock.history(start=start_date, end=end_date, interval="1wk") # Weekly data
+        logging.info("Fetching stock data for %s from %s to %s", symbol, start_date, end_date)
+        # Weekly data; yf.download returns prices only, without building a Ticker object
+        df = FILE_CACHE.get_or_fetch(
+            symbol, 'history',
+            lambda: yf.download(symbol, start=start_date, end=end_date, interval="1wk",
+                                progress=False, auto_adjust=True, multi_level_index=False),
+            start_date, end_date)
         if df.empty:
             error_message = f"No data found for symbol {symbol} within the specified date range."
-            st.error(error_message)
             logging.error(error_message)
-            return None
+            raise FetchError(error_message)
 
-        # Calculate moving averages
-        df['MA50'] = df['Close'].rolling(window=50).mean()
-        df['MA200'] = df['Close'].rolling(window=200).mean()
+        # Keep only the price columns the charts use (drops Volume before copying it around)
+        df = _add_indicators(df[_PRICE_COLUMNS].copy())
 
-        # Calculate RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        logging.info(f"Successfully fetched and processed stock data for {symbol}")
+        logging.info("Successfully fetched and processed stock data for %s", symbol)
         return df
+    except FetchError:
+        raise
     except Exception as e:
         error_message = f"Error fetching stock data for {symbol}: {e}"
-        st.error(error_message)
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_stock_data_batch(symbols, start_date, end_date):
+    """
+    Fetches weekly stock data for several symbols with one threaded yf.download call.
+
+    Args:
+        symbols (list of str): The stock symbols (e.g., ['AAPL', 'MSFT']).
+        start_date (datetime): The start date for the data.
+        end_date (datetime): The end date for the data.
+
+    Returns:
+        dict: Maps each symbol to its DataFrame (with MA50, MA200 and RSI),
+              or to None if no data was found for it.
+
+    Raises:
+        FetchError: If fetching the data fails.
+    """
+    import yfinance as yf
+    try:
+        symbols = list(dict.fromkeys(symbols))  # Drop duplicates, keep order
+        logging.info("Fetching stock data for %s from %s to %s", symbols, start_date, end_date)
+        data = yf.download(symbols, start=start_date, end=end_date, interval="1wk", group_by='ticker',
+                           threads=True, progress=False, auto_adjust=True, multi_level_index=True)
+
+        stock_data = {}
+        downloaded = set(data.columns.get_level_values(0))
+        for symbol in symbols:
+            df = data[symbol].dropna(how='all') if symbol in downloaded else None
+            if df is None or len(df) == 0:
+                error_message = f"No data found for symbol {symbol} within the specified date range."
+                logging.error(error_message)
+                stock_data[symbol] = None
+                continue
+            stock_data[symbol] = _add_indicators(df[_PRICE_COLUMNS].copy())
+
+        logging.info("Successfully fetched and processed stock data for %s", symbols)
+        return stock_data
+    except FetchError:
+        raise
+    except Exception as e:
+        error_message = f"Error fetching stock data for {symbols}: {e}"
+        logging.error(error_message, exc_info=True)
+        raise FetchError(error_message) from e
 
+# Cache the figure so reruns that don't change the data skip rebuilding it
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_stock_data(df, symbol):
     """
     Plots the stock price as a candlestick chart and moving averages.
@@ -84,22 +248,36 @@ def plot_stock_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
-        logging.warning(f"plot_stock_data called with empty DataFrame for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
+        logging.warning("plot_stock_data called with empty DataFrame for symbol %s", symbol)
         return None
 
     try:
+        # Thin out very long histories; the candlesticks keep the shape of the price line
+        if len(df) > _MAX_PLOT_POINTS:
+            df = df.iloc[lttb_indices(df['Close'].to_numpy(), _DOWNSAMPLED_POINTS)]
+
+        # Hand plotly plain NumPy arrays so it skips its per-Series inspection.
+        # The naive DatetimeIndex from yf.download is passed as-is; plotly serializes it directly.
+        dates = df.index
+        open_prices = df['Open'].to_numpy()
+        high_prices = df['High'].to_numpy()
+        low_prices = df['Low'].to_numpy()
+        close_prices = df['Close'].to_numpy()
+
         # Create the candlestick chart
         fig = go.Figure(data=[go.Candlestick(
-            x=df.index,
-            open=df['Open'],
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
+            x=dates,
+            open=open_prices,
+            high=high_prices,
+            low=low_prices,
+            close=close_prices,
             name=f'{symbol} Price'
         )])
-        fig.add_trace(go.Scatter(x=df.index, y=df['MA50'], name='50-day MA', line=dict(color='orange')))
-        fig.add_trace(go.Scatter(x=df.index, y=df['MA200'], name='200-day MA', line=dict(color='red')))
+        # WebGL traces keep the MA overlays cheap to draw on long (20-25 year) ranges
+        fig.add_trace(go.Scattergl(x=dates, y=df['MA50'].to_numpy(), name='50-day MA', line=dict(color='orange')))
+        fig.add_trace(go.Scattergl(x=dates, y=df['MA200'].to_numpy(), name='200-day MA', line=dict(color='red')))
 
         fig.update_layout(
             title=f'{symbol} Stock Price with Moving Averages (Weekly)',
@@ -110,7 +288,7 @@ def plot_stock_data(df, symbol):
             yaxis_type="log",
             height=500,
         )
-        logging.info(f"Successfully plotted stock data for {symbol}")
+        logging.info("Successfully plotted stock data for %s", symbol)
         return fig
     except Exception as e:
         error_message = f"Error plotting stock data for {symbol}: {e}"
@@ -118,6 +296,7 @@ def plot_stock_data(df, symbol):
         logging.error(error_message, exc_info=True)
         return None
 
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_rsi_data(df, symbol):
     """
     Plots the RSI data.
@@ -129,18 +308,22 @@ def plot_rsi_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The RSI plot, or None if the DataFrame is empty or RSI is missing.
     """
-    if df is None or df.empty or 'RSI' not in df:
-        logging.warning(f"plot_rsi_data called with empty DataFrame or missing RSI for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0 or 'RSI' not in df:
+        logging.warning("plot_rsi_data called with empty DataFrame or missing RSI for symbol %s", symbol)
         return None
 
     try:
-        # Create the RSI plot
-        fig_rsi = go.Figure(data=[go.Scatter(
+        # Create the RSI plot (WebGL, like the MA overlays, for long histories)
+        fig_rsi = go.Figure(data=[go.Scattergl(
             x=df.index,
-            y=df['RSI'],
+            y=df['RSI'].to_numpy(),
             name='RSI',
             line=dict(color='blue')
         )])
+        # Overbought / oversold levels as layout lines rather than extra full-length traces
+        fig_rsi.add_hline(y=70, line=dict(color='red', dash='dash'))
+        fig_rsi.add_hline(y=30, line=dict(color='green', dash='dash'))
 
         # Define the layout for the RSI plot
         fig_rsi.update_layout(
@@ -151,7 +334,7 @@ def plot_rsi_data(df, symbol):
             height=300,
             yaxis_range=[0, 100] # Ensure y-axis range is 0-100 for RSI
         )
-        logging.info(f"Successfully plotted RSI data for {symbol}")
+        logging.info("Successfully plotted RSI data for %s", symbol)
         return fig_rsi
     except Exception as e:
         error_message = f"Error plotting RSI data for {symbol}: {e}"
@@ -161,6 +344,7 @@ def plot_rsi_data(df, symbol):
 
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_revenue_data(symbol, start_date, end_date):
     """
     Fetches revenue data from yfinance, filtered by date range.
@@ -172,43 +356,48 @@ def get_revenue_data(symbol, start_date, end_date):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the revenue data,
-                          or None if an error occurs or no revenue data is available.
+                          or None if no revenue data is available.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
     try:
-        logging.info(f"Fetching revenue data for {symbol} from {start_date} to {end_date}")
-        stock = yf.Ticker(symbol)
+        logging.info("Fetching revenue data for %s from %s to %s", symbol, start_date, end_date)
+        stock = _get_ticker(symbol)
         # Fetch quarterly revenue
-        revenue_data = stock.quarterly_income_stmt
+        revenue_data = FILE_CACHE.get_or_fetch(symbol, 'quarterly_income_stmt', lambda: stock.quarterly_income_stmt, ttl=FINANCIALS_TTL)
         if revenue_data is None or revenue_data.empty:
-            logging.warning(f"No revenue data found for symbol {symbol}")
+            logging.warning("No revenue data found for symbol %s", symbol)
             return None
 
         # Convert to DataFrame and transpose
         revenue_df = revenue_data.T
-        revenue_df.index = pd.to_datetime(revenue_df.index)
-        revenue_df = revenue_df.sort_index() # Sort by date
+        revenue_df.index = _to_datetime_index(revenue_df.index)
+        if not revenue_df.index.is_monotonic_increasing:
+            revenue_df = revenue_df.sort_index() # Sort by date
 
         # Select the revenue column
         if 'Total Revenue' in revenue_df.columns:
-            revenue_df = revenue_df[['Total Revenue']]
+            revenue = revenue_df['Total Revenue']
         elif 'Revenue' in revenue_df.columns:
-            revenue_df = revenue_df[['Revenue']]
+            revenue = revenue_df['Revenue']
         else:
-            logging.warning(f"No Revenue or Total Revenue column found for symbol {symbol}")
+            logging.warning("No Revenue or Total Revenue column found for symbol %s", symbol)
             return None
         
-        # Filter by date range
-        revenue_df = revenue_df[(revenue_df.index >= start_date) & (revenue_df.index <= end_date)]
-        revenue_df = revenue_df.dropna()
+        # Drop missing quarters on the one column, then slice the sorted index by date
+        revenue_df = revenue.dropna().loc[start_date:end_date].to_frame()
 
-        logging.info(f"Successfully fetched revenue data for {symbol}")
+        logging.info("Successfully fetched revenue data for %s", symbol)
         return revenue_df
+    except FetchError:
+        raise
     except Exception as e:
         error_message = f"Error fetching revenue data for {symbol}: {e}"
-        st.error(error_message)
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
 
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_revenue_data(df, symbol):
     """
     Plots the revenue data.
@@ -220,15 +409,16 @@ def plot_revenue_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The revenue plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
-        logging.warning(f"plot_revenue_data called with empty DataFrame for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
+        logging.warning("plot_revenue_data called with empty DataFrame for symbol %s", symbol)
         return None
 
     try:
         # Create the revenue plot
         fig_revenue = go.Figure(data=[go.Bar(
             x=df.index,
-            y=df.iloc[:, 0], # Use the first column for revenue data
+            y=df.iloc[:, 0].to_numpy(), # Use the first column for revenue data
             name='Revenue',
             marker_color='purple'
         )])
@@ -241,7 +431,7 @@ def plot_revenue_data(df, symbol):
             template='plotly_dark',
             height=300,
         )
-        logging.info(f"Successfully plotted revenue data for {symbol}")
+        logging.info("Successfully plotted revenue data for %s", symbol)
         return fig_revenue
     except Exception as e:
         error_message = f"Error plotting revenue data for {symbol}: {e}"
@@ -249,6 +439,7 @@ def plot_revenue_data(df, symbol):
         logging.error(error_message, exc_info=True)
         return None
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_dividend_data(symbol, start_date, end_date):
     """
     Fetches dividend data from yfinance.
@@ -260,35 +451,38 @@ def get_dividend_data(symbol, start_date, end_date):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the dividend data,
-                          or None if an error occurs.
+                          or None if no dividend data is available.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
     try:
-        logging.info(f"Fetching dividend data for {symbol} from {start_date} to {end_date}")
-        stock = yf.Ticker(symbol)
-        dividends = stock.dividends
+        logging.info("Fetching dividend data for %s from %s to %s", symbol, start_date, end_date)
+        stock = _get_ticker(symbol)
+        dividends = FILE_CACHE.get_or_fetch(symbol, 'dividends', lambda: stock.dividends.to_frame())
         if dividends.empty:
-            logging.warning(f"No dividend data found for symbol {symbol}")
+            logging.warning("No dividend data found for symbol %s", symbol)
             return None
 
-        # Convert to DataFrame
+        # Convert to DataFrame with a UTC index, sorted once so the date filter is a slice
         dividends_df = pd.DataFrame(dividends)
-        dividends_df.index = pd.to_datetime(dividends_df.index)
-
-        # Filter by date range, handling timezones
-        start_date_tz = start_date.replace(tzinfo=pytz.utc) # Ensure start_date is UTC
-        end_date_tz = end_date.replace(tzinfo=pytz.utc)     # Ensure end_date is UTC
+        dividends_df.index = _to_datetime_index(dividends_df.index, utc=True)
+        if not dividends_df.index.is_monotonic_increasing:
+            dividends_df = dividends_df.sort_index()
 
-        dividends_df = dividends_df[(dividends_df.index >= start_date_tz) & (dividends_df.index <= end_date_tz)]
-        dividends_df = dividends_df.sort_index()
+        # Filter by date range (binary search on the sorted index instead of a full mask)
+        dividends_df = dividends_df.loc[pd.Timestamp(start_date, tz='UTC'):pd.Timestamp(end_date, tz='UTC')]
 
-        logging.info(f"Successfully fetched dividend data for {symbol}")
+        logging.info("Successfully fetched dividend data for %s", symbol)
         return dividends_df
+    except FetchError:
+        raise
     except Exception as e:
-        error_message = f"Error plotting dividend data for {symbol}: {e}"
-        st.error(error_message)
+        error_message = f"Error fetching dividend data for {symbol}: {e}"
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
 
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_dividend_data(df, symbol):
     """
     Plots the dividend data.
@@ -300,15 +494,16 @@ def plot_dividend_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The dividend plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
-        logging.warning(f"plot_dividend_data called with empty DataFrame for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
+        logging.warning("plot_dividend_data called with empty DataFrame for symbol %s", symbol)
         return None
 
     try:
         # Create the dividend plot
         fig_dividend = go.Figure(data=[go.Bar(
             x=df.index,
-            y=df['Dividends'],
+            y=df['Dividends'].to_numpy(),
             name='Dividends',
             marker_color='green'
         )])
@@ -321,7 +516,7 @@ def plot_dividend_data(df, symbol):
             template='plotly_dark',
             height=300,
         )
-        logging.info(f"Successfully plotted dividend data for {symbol}")
+        logging.info("Successfully plotted dividend data for %s", symbol)
         return fig_dividend
     except Exception as e:
         error_message = f"Error plotting dividend data for {symbol}: {e}"
@@ -330,6 +525,7 @@ def plot_dividend_data(df, symbol):
         return None
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_quarterly_free_cash_flow_data(symbol, start_date, end_date):
     """
     Fetches quarterly free cash flow data from yfinance, filtered by date range.
@@ -341,42 +537,47 @@ def get_quarterly_free_cash_flow_data(symbol, start_date, end_date):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the free cash flow data,
-                          or None if an error occurs or no free cash flow data is available.
+                          or None if no free cash flow data is available.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
     try:
-        logging.info(f"Fetching quarterly free cash flow data for {symbol} from {start_date} to {end_date}")
-        stock = yf.Ticker(symbol)
+        logging.info("Fetching quarterly free cash flow data for %s from %s to %s", symbol, start_date, end_date)
+        stock = _get_ticker(symbol)
         # Fetch quarterly cash flow
-        cashflow_data = stock.quarterly_cashflow
+        cashflow_data = FILE_CACHE.get_or_fetch(symbol, 'quarterly_cashflow', lambda: stock.quarterly_cashflow, ttl=FINANCIALS_TTL)
         if cashflow_data is None or cashflow_data.empty:
-            logging.warning(f"No quarterly cash flow data found for symbol {symbol}")
+            logging.warning("No quarterly cash flow data found for symbol %s", symbol)
             return None
 
         # Convert to DataFrame and transpose
         cashflow_df = cashflow_data.T
-        cashflow_df.index = pd.to_datetime(cashflow_df.index)
-        cashflow_df = cashflow_df.sort_index() # Sort by date
+        cashflow_df.index = _to_datetime_index(cashflow_df.index)
+        if not cashflow_df.index.is_monotonic_increasing:
+            cashflow_df = cashflow_df.sort_index() # Sort by date
 
         # Select the 'Free Cash Flow' column (it's a column in this structure)
         if 'Free Cash Flow' in cashflow_df.columns:
-            free_cash_flow_df = cashflow_df[['Free Cash Flow']]
+            free_cash_flow = cashflow_df['Free Cash Flow']
         else:
-            logging.warning(f"No 'Free Cash Flow' column found for symbol {symbol} in quarterly cash flow data.")
+            logging.warning("No 'Free Cash Flow' column found for symbol %s in quarterly cash flow data.", symbol)
             return None
         
-        # Filter by date range
-        free_cash_flow_df = free_cash_flow_df[(free_cash_flow_df.index >= start_date) & (free_cash_flow_df.index <= end_date)]
-        free_cash_flow_df = free_cash_flow_df.dropna()
+        # Drop missing periods on the one column, then slice the sorted index by date
+        free_cash_flow_df = free_cash_flow.dropna().loc[start_date:end_date].to_frame()
 
 
-        logging.info(f"Successfully fetched quarterly free cash flow data for {symbol}")
+        logging.info("Successfully fetched quarterly free cash flow data for %s", symbol)
         return free_cash_flow_df
+    except FetchError:
+        raise
     except Exception as e:
         error_message = f"Error fetching quarterly free cash flow data for {symbol}: {e}"
-        st.error(error_message)
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
 
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_quarterly_free_cash_flow_data(df, symbol):
     """
     Plots the quarterly free cash flow data.
@@ -388,15 +589,16 @@ def plot_quarterly_free_cash_flow_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The free cash flow plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
-        logging.warning(f"plot_quarterly_free_cash_flow_data called with empty DataFrame for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
+        logging.warning("plot_quarterly_free_cash_flow_data called with empty DataFrame for symbol %s", symbol)
         return None
 
     try:
         # Create the free cash flow plot
         fig_free_cash_flow = go.Figure(data=[go.Bar(
             x=df.index,
-            y=df['Free Cash Flow'], # Use the 'Free Cash Flow' column
+            y=df['Free Cash Flow'].to_numpy(), # Use the 'Free Cash Flow' column
             name='Free Cash Flow',
             marker_color='teal'
         )])
@@ -409,7 +611,7 @@ def plot_quarterly_free_cash_flow_data(df, symbol):
             template='plotly_dark',
             height=300,
         )
-        logging.info(f"Successfully plotted quarterly free cash flow data for {symbol}")
+        logging.info("Successfully plotted quarterly free cash flow data for %s", symbol)
         return fig_free_cash_flow
     except Exception as e:
         error_message = f"Error plotting quarterly free cash flow data for {symbol}: {e}"
@@ -417,6 +619,7 @@ def plot_quarterly_free_cash_flow_data(df, symbol):
         logging.error(error_message, exc_info=True)
         return None
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_annual_free_cash_flow_data(symbol, start_date, end_date):
     """
     Fetches annual free cash flow data from yfinance, filtered by date range.
@@ -429,42 +632,47 @@ def get_annual_free_cash_flow_data(symbol, start_date, end_date):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the annual free cash flow data,
-                          or None if an error occurs or no free cash flow data is available.
+                          or None if no free cash flow data is available.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
     try:
-        logging.info(f"Fetching annual free cash flow data for {symbol}")
-        stock = yf.Ticker(symbol)
+        logging.info("Fetching annual free cash flow data for %s", symbol)
+        stock = _get_ticker(symbol)
         # Fetch annual cash flow
-        cashflow_data = stock.cashflow
+        cashflow_data = FILE_CACHE.get_or_fetch(symbol, 'cashflow', lambda: stock.cashflow, ttl=FINANCIALS_TTL)
         if cashflow_data is None or cashflow_data.empty:
-            logging.warning(f"No annual cash flow data found for symbol {symbol}")
+            logging.warning("No annual cash flow data found for symbol %s", symbol)
             return None
 
         # Convert to DataFrame and transpose
         cashflow_df = cashflow_data.T
-        cashflow_df.index = pd.to_datetime(cashflow_df.index)
-        cashflow_df = cashflow_df.sort_index() # Sort by date
+        cashflow_df.index = _to_datetime_index(cashflow_df.index)
+        if not cashflow_df.index.is_monotonic_increasing:
+            cashflow_df = cashflow_df.sort_index() # Sort by date
 
         # Select the 'Free Cash Flow' column
         if 'Free Cash Flow' in cashflow_df.columns:
-            free_cash_flow_df = cashflow_df[['Free Cash Flow']]
+            free_cash_flow = cashflow_df['Free Cash Flow']
         else:
-            logging.warning(f"No 'Free Cash Flow' column found for symbol {symbol} in annual cash flow data.")
+            logging.warning("No 'Free Cash Flow' column found for symbol %s in annual cash flow data.", symbol)
             return None
 
-        # Filter by date range
-        free_cash_flow_df = free_cash_flow_df[(free_cash_flow_df.index >= start_date) & (free_cash_flow_df.index <= end_date)]
-        free_cash_flow_df = free_cash_flow_df.dropna()
+        # Drop missing periods on the one column, then slice the sorted index by date
+        free_cash_flow_df = free_cash_flow.dropna().loc[start_date:end_date].to_frame()
 
 
-        logging.info(f"Successfully fetched annual free cash flow data for {symbol}")
+        logging.info("Successfully fetched annual free cash flow data for %s", symbol)
         return free_cash_flow_df
+    except FetchError:
+        raise
     except Exception as e:
         error_message = f"Error fetching annual free cash flow data for {symbol}: {e}"
-        st.error(error_message)
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
 
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_annual_free_cash_flow_data(df, symbol):
     """
     Plots the annual free cash flow data.
@@ -476,15 +684,16 @@ def plot_annual_free_cash_flow_data(df, symbol):
     Returns:
         plotly.graph_objects.Figure: The free cash flow plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
-        logging.warning(f"plot_annual_free_cash_flow_data called with empty DataFrame for symbol {symbol}")
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
+        logging.warning("plot_annual_free_cash_flow_data called with empty DataFrame for symbol %s", symbol)
         return None
 
     try:
         # Create the free cash flow plot
         fig_free_cash_flow = go.Figure(data=[go.Bar(
             x=df.index,
-            y=df['Free Cash Flow'], # Use the 'Free Cash Flow' column
+            y=df['Free Cash Flow'].to_numpy(), # Use the 'Free Cash Flow' column
             name='Free Cash Flow',
             marker_color='orange' # Using a different color for annual
         )])
@@ -497,7 +706,7 @@ def plot_annual_free_cash_flow_data(df, symbol):
             template='plotly_dark',
             height=300,
         )
-        logging.info(f"Successfully plotted annual free cash flow data for {symbol}")
+        logging.info("Successfully plotted annual free cash flow data for %s", symbol)
         return fig_free_cash_flow
     except Exception as e:
         error_message = f"Error plotting annual free cash flow data for {symbol}: {e}"
@@ -506,6 +715,18 @@ def plot_annual_free_cash_flow_data(df, symbol):
         return None
 
 
+@lru_cache(maxsize=64)
+def _world_bank_url(series_ids, start_year, end_year):
+    """
+    Builds the World Bank API URL for one or more ';'-separated series and a year range.
+
+    Memoized so Streamlit reruns with an unchanged date range reuse the same string.
+    """
+    # Requesting several series at once requires naming their source (2 = WDI)
+    return f"{WORLD_BANK_API_URL}{series_ids}?source=2&date={start_year}:{end_year}&format=json&per_page=1000"
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_economic_data(start_date, end_date):
     """
     Fetches US GDP and Inflation data from the World Bank API.
@@ -516,100 +737,95 @@ def get_economic_data(start_date, end_date):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the GDP and Inflation data,
-                          or None if an error occurs or no data is available.
+                          or None if no data is available.
+
+    Raises:
+        FetchError: If fetching the data fails.
     """
     try:
-        logging.info(f"Fetching economic data from World Bank for {start_date.year} to {end_date.year}")
+        logging.info("Fetching economic data from World Bank for %s to %s", start_date.year, end_date.year)
         
-        # World Bank API uses annual data, so use the year range
-        date_range = f"{start_date.year}:{end_date.year}"
-
-        # Construct API URLs for GDP and Inflation
-        gdp_url = f"{WORLD_BANK_API_URL}{GDP_SERIES_ID}?date={date_range}&format=json&per_page=1000"
-        inflation_url = f"{WORLD_BANK_API_URL}{INFLATION_SERIES_ID}?date={date_range}&format=json&per_page=1000"
+        # World Bank API uses annual data, so only the year range goes into the URL.
+        # Both series are requested together, which saves a round trip.
+        url = _world_bank_url(f"{GDP_SERIES_ID};{INFLATION_SERIES_ID}", start_date.year, end_date.year)
 
         # Fetch data
         try:
-            gdp_response = requests.get(gdp_url)
-            gdp_response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            inflation_response = requests.get(inflation_url)
-            inflation_response.raise_for_status()
+            response = WORLD_BANK_SESSION.get(url, timeout=10)
+            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
         except requests.exceptions.RequestException as e:
             error_message = f"Error fetching data from World Bank API: {e}"
-            st.error(error_message)
             logging.error(error_message, exc_info=True)
-            return None
+            raise FetchError(error_message) from e
 
-        # Parse JSON responses
+        # Parse the JSON response straight from the raw bytes (skips building .text)
         try:
-            gdp_data = json.loads(gdp_response.text)
-            inflation_data = json.loads(inflation_response.text)
+            data = json_loads(response.content)
         except json.JSONDecodeError as e:
             error_message = f"Error decoding JSON response from World Bank API: {e}"
-            st.error(error_message)
             logging.error(error_message, exc_info=True)
-            return None
+            raise FetchError(error_message) from e
 
         # World Bank API returns a list of lists, the second list contains the data
-        gdp_observations = gdp_data[1] if len(gdp_data) > 1 else []
-        inflation_observations = inflation_data[1] if len(inflation_data) > 1 else []
+        # (None when nothing matched). Split the observations back into the two series.
+        observations = (data[1] if len(data) > 1 else None) or []
+        gdp_observations = [obs for obs in observations if obs['indicator']['id'] == GDP_SERIES_ID]
+        inflation_observations = [obs for obs in observations if obs['indicator']['id'] == INFLATION_SERIES_ID]
 
         if not gdp_observations and not inflation_observations:
              error_message = "No economic data found from World Bank for the specified date range."
-             st.warning(error_message)
              logging.warning(error_message)
              return None
 
-        # Convert data to pandas DataFrames
-        gdp_df = pd.DataFrame(gdp_observations)
-        inflation_df = pd.DataFrame(inflation_observations)
-
         economic_df = None
 
         # Process GDP data if available
-        if not gdp_df.empty:
-            gdp_df = gdp_df[['date', 'value']].copy() # Select relevant columns
-            gdp_df['date'] = pd.to_datetime(gdp_df['date'])
-            gdp_df['value'] = pd.to_numeric(gdp_df['value'], errors='coerce')
-            gdp_df = gdp_df.rename(columns={'value': 'GDP'})
-            gdp_df = gdp_df.dropna()
-            economic_df = gdp_df.set_index('date')
+        if gdp_observations:
+            # Build typed arrays from the two fields we need instead of letting pandas
+            # inspect every observation dict. World Bank dates are plain years, which
+            # numpy parses natively as datetime64[Y].
+            # float32 / second resolution is plenty for annual figures and halves what plotly serializes.
+            # Values are already numbers (None when missing), so numpy converts them directly.
+            gdp_df = pd.DataFrame(
+                {'GDP': np.array([obs['value'] for obs in gdp_observations], dtype=np.float32)},
+                index=pd.DatetimeIndex(np.array([obs['date'] for obs in gdp_observations], dtype='datetime64[Y]').astype('datetime64[s]'), name='date'),
+            )
+            economic_df = gdp_df.dropna().sort_index()
 
 
         # Process Inflation data if available
-        if not inflation_df.empty:
-            inflation_df = inflation_df[['date', 'value']].copy() # Select relevant columns
-            inflation_df['date'] = pd.to_datetime(inflation_df['date'])
-            inflation_df['value'] = pd.to_numeric(inflation_df['value'], errors='coerce')
-            inflation_df = inflation_df.rename(columns={'value': 'Inflation'})
-            inflation_df = inflation_df.dropna()
+        if inflation_observations:
+            inflation_df = pd.DataFrame(
+                {'Inflation': np.array([obs['value'] for obs in inflation_observations], dtype=np.float32)},
+                index=pd.DatetimeIndex(np.array([obs['date'] for obs in inflation_observations], dtype='datetime64[Y]').astype('datetime64[s]'), name='date'),
+            )
+            inflation_df = inflation_df.dropna().sort_index()
 
             if economic_df is None:
-                economic_df = inflation_df.set_index('date')
+                economic_df = inflation_df
             else:
-                # Merge with GDP data
-                economic_df = pd.merge(economic_df, inflation_df.set_index('date'), left_index=True, right_index=True, how='outer')
+                # Join with GDP data on the (sorted) date index
+                economic_df = economic_df.join(inflation_df, how='outer')
 
 
         if economic_df is not None and not economic_df.empty:
-            economic_df = economic_df.sort_index()
             logging.info("Successfully fetched and processed economic data from World Bank.")
             return economic_df
         else:
             error_message = "Failed to process economic data from World Bank."
-            st.error(error_message)
             logging.error(error_message)
-            return None
-
-
+            raise FetchError(error_message)
+    except FetchError:
+        raise
     except Exception as e: # Catch any exception
         error_message = f"Error occurred while fetching economic data from World Bank: {e}"
-        st.error(error_message)
         logging.error(error_message, exc_info=True)
-        return None
+        raise FetchError(error_message) from e
 
 
 
+# Cache the figure so reruns that don't change the data skip rebuilding it
+@st.cache_resource(ttl=3600, show_spinner=False)
 def plot_economic_data(df):
     """
     Plots the US GDP (Bar) and Inflation (Line) data.
@@ -620,19 +836,22 @@ def plot_economic_data(df):
     Returns:
         plotly.graph_objects.Figure: The plot, or None if the DataFrame is empty.
     """
-    if df is None or df.empty:
+    import plotly.graph_objects as go
+    if df is None or len(df) == 0:
         logging.warning("plot_economic_data called with empty DataFrame")
         return None
 
     try:
         fig = go.Figure()
+        dates = df.index.to_numpy()
+        cols = df.columns
         
         # Determine which data is available and add traces accordingly
-        if 'GDP' in df.columns and 'Inflation' in df.columns:
+        if 'GDP' in cols and 'Inflation' in cols:
             # Add GDP trace as a Bar chart
-            fig.add_trace(go.Bar(x=df.index, y=df['GDP'], name='US GDP (Current USD)', marker_color='green'))
+            fig.add_trace(go.Bar(x=dates, y=df['GDP'].to_numpy(), name='US GDP (Current USD)', marker_color='green'))
             # Add Inflation trace as a Scatter (Line) chart
-            fig.add_trace(go.Scatter(x=df.index, y=df['Inflation'], name='US Inflation (Annual %)', line=dict(color='blue'), yaxis="y2"))
+            fig.add_trace(go.Scatter(x=dates, y=df['Inflation'].to_numpy(), name='US Inflation (Annual %)', line=dict(color='blue'), yaxis="y2"))
 
             # Define layout with two y-axes
             fig.update_layout(
@@ -648,9 +867,9 @@ def plot_economic_data(df):
                 template='plotly_dark',
                 height=500,
             )
-        elif 'GDP' in df.columns:
+        elif 'GDP' in cols:
             # Add GDP trace as a Bar chart
-            fig.add_trace(go.Bar(x=df.index, y=df['GDP'], name='US GDP (Current USD)', marker_color='green'))
+            fig.add_trace(go.Bar(x=dates, y=df['GDP'].to_numpy(), name='US GDP (Current USD)', marker_color='green'))
             fig.update_layout(
                 title='US GDP (Annual)',
                 xaxis_title='Date',
@@ -659,9 +878,9 @@ def plot_economic_data(df):
                 template='plotly_dark',
                 height=500,
             )
-        elif 'Inflation' in df.columns:
+        elif 'Inflation' in cols:
             # Add Inflation trace as a Scatter (Line) chart
-            fig.add_trace(go.Scatter(x=df.index, y=df['Inflation'], name='US Inflation (Annual %)', line=dict(color='blue')))
+            fig.add_trace(go.Scatter(x=dates, y=df['Inflation'].to_numpy(), name='US Inflation (Annual %)', line=dict(color='blue')))
             fig.update_layout(
                 title='US Inflation (Annual)',
                 xaxis_title='Date',
@@ -730,48 +949,31 @@ def get_gemini_response(prompt_text, full_chat_history):
             return generated_text
         else:
             # Handle cases where the response structure is unexpected or content is missing
-            logging.error(f"Unexpected response structure from Gemini API: {json.dumps(result, indent=2)}")
+            logging.error("Unexpected response structure from Gemini API: %s", json.dumps(result, indent=2))
             # Try to get a specific error message if available
             error_message = result.get('error', {}).get('message', 'Unknown error from Gemini API.')
             return f"Error: Could not get a valid response from Gemini. Details: {error_message}"
 
     except requests.exceptions.RequestException as e:
-        logging.error(f"Network or API error calling Gemini: {e}")
+        logging.error("Network or API error calling Gemini: %s", e)
         return f"Error connecting to Gemini: {e}"
     except json.JSONDecodeError as e:
-        logging.error(f"JSON decode error from Gemini response: {e}")
+        logging.error("JSON decode error from Gemini response: %s", e)
         return f"Error parsing Gemini response: {e}"
     except Exception as e:
-        logging.error(f"An unexpected error occurred during Gemini API call: {e}", exc_info=True)
+        logging.error("An unexpected error occurred during Gemini API call: %s", e, exc_info=True)
         return f"An unexpected error occurred: {e}"
 
 
-def main():
+@st.fragment
+def gemini_chat_sidebar():
     """
-    Main function to run the Streamlit application.
-    """
-    st.set_page_config(layout="wide") # Wide mode
-
-    # Sidebar
-    st.sidebar.title('Enthusiast Space for Finance') # Updated title here
-    default_stock = "AAPL" # Set Apple as the default
-    stock_symbol = st.sidebar.text_input('Enter Stock Symbol (e.g., AAPL, GOOG, MSFT)', default_stock).upper()
-
-    # Date range selection using buttons in sidebar
-    st.sidebar.subheader("Select Date Range")
-    today = datetime.today()
-    years = [1, 5, 10, 20, 25]
-    cols = st.sidebar.columns(len(years)) # create as many columns as there are years
-    selected_time_frame = 5 # Default to 5 years
-    for i, year in enumerate(years):
-        with cols[i]: # iterate through the columns
-            if st.button(f"{year} Year{'s' if year > 1 else ''}"):
-                selected_time_frame = year
-    start_date = today - relativedelta(years=selected_time_frame)
-    end_date = today
+    Renders the Gemini chat. Call it inside `with st.sidebar:`.
 
-    # Sidebar for Gemini Chat
-    st.sidebar.subheader("Gemini Chat")
+    Runs as a fragment, so sending a message reruns only the chat instead of
+    refetching and replotting the whole page.
+    """
+    st.subheader("Gemini Chat")
 
     # Initialize chat history in session state
     if "chat_history" not in st.session_state:
@@ -781,25 +983,78 @@ def main():
 
     # Display chat messages from history
     for message in st.session_state.chat_history:
-        with st.sidebar.chat_message(message["role"]):
-            st.sidebar.markdown(message["content"])
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
 
     # Chat input for the user
-    if prompt := st.sidebar.chat_input("Ask Gemini about finance..."):
-        # Add userstate.chat_history.append({"role": "user", "content": prompt})
+    if prompt := st.chat_input("Ask Gemini about finance..."):
+        # Add user message to chat history
+        st.session_state.chat_history.append({"role": "user", "content": prompt})
         # Display user message
-        with st.sidebar.chat_message("user"):
-            st.sidebar.markdown(prompt)
+        with st.chat_message("user"):
+            st.markdown(prompt)
 
         # Get response from Gemini
         with st.spinner("Gemini is thinking..."):
             gemini_response = get_gemini_response(prompt, st.session_state.chat_history)
-        
+
         # Add model response to chat history
         st.session_state.chat_history.append({"role": "model", "content": gemini_response})
         # Display model response
-        with st.sidebar.chat_message("model"):
-            st.sidebar.markdown(gemini_response)
+        with st.chat_message("model"):
+            st.markdown(gemini_response)
+
+
+@lru_cache(maxsize=32)
+def _start_date(year, today_ord):
+    """
+    Returns the date `year` years before the given day.
+
+    Args:
+        year (int): Number of years to go back.
+        today_ord (int): The current day as returned by date.toordinal().
+
+    Returns:
+        datetime: Midnight of the start day.
+    """
+    today = datetime.fromordinal(today_ord)
+    try:
+        return today.replace(year=today.year - year)
+    except ValueError:  # Feb 29 going back to a non-leap year
+        return today.replace(year=today.year - year, day=28)
+
+
+def main():
+    """
+    Main function to run the Streamlit application.
+    """
+    st.set_page_config(layout="wide") # Wide mode
+
+    # Sidebar
+    st.sidebar.title('Enthusiast Space for Finance') # Updated title here
+    default_stock = "AAPL" # Set Apple as the default
+    symbols_input = st.sidebar.text_input('Enter Stock Symbol (e.g., AAPL, GOOG, MSFT)', default_stock,
+                                          help="Separate several symbols with commas to add a watchlist.").upper()
+    # The first symbol gets the full analysis, the rest form the watchlist
+    symbols = [s.strip() for s in symbols_input.split(',') if s.strip()] or [default_stock]
+    stock_symbol, watchlist = symbols[0], tuple(symbols[1:])
+
+    # Date range selection using buttons in sidebar
+    st.sidebar.subheader("Select Date Range")
+    # Midnight, so the cached fetchers see the same arguments all day
+    today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+    cols = st.sidebar.columns(len(_YEARS)) # create as many columns as there are years
+    selected_time_frame = 5 # Default to 5 years
+    for i, year in enumerate(_YEARS):
+        with cols[i]: # iterate through the columns
+            if st.button(f"{year} Year{'s' if year > 1 else ''}"):
+                selected_time_frame = year
+    start_date = _start_date(selected_time_frame, today.toordinal())
+    end_date = today
+
+    # Sidebar for Gemini Chat
+    with st.sidebar:
+        gemini_chat_sidebar()
 
     # Main page
     st.title('Enthusiast Space for Finance') # Main title
@@ -807,8 +1062,32 @@ def main():
     st.write("Enthusiast Space for Finance helps you look at different companies' stocks and the overall economy. You tell it which company you're interested in and how far back you want to look, it gets the stock data and important economic numbers. Then, it shows all of this to you in easy-to-understand charts.")
 
     st.header(f"Stock Data for {stock_symbol}")
-    # Fetch and plot stock data
-    stock_df = get_stock_data(stock_symbol, start_date, end_date)
+    # Revenue and free cash flow follow the selected range, back to 2000 at most
+    revenue_start_date = max(start_date, MIN_FUNDAMENTALS_DATE)
+    quarterly_free_cash_flow_start_date = max(start_date, MIN_FUNDAMENTALS_DATE)
+
+    # Fetch everything concurrently, all the fetchers are network-bound. _fetch turns
+    # failures into error messages, which are shown below in the section they belong to.
+    with ThreadPoolExecutor(max_workers=7) as executor:
+        stock_future = executor.submit(_fetch, get_stock_data, stock_symbol, start_date, end_date)
+        dividend_future = executor.submit(_fetch, get_dividend_data, stock_symbol, start_date, end_date)
+        revenue_future = executor.submit(_fetch, get_revenue_data, stock_symbol, revenue_start_date, end_date)
+        annual_free_cash_flow_future = executor.submit(_fetch, get_annual_free_cash_flow_data, stock_symbol, start_date, end_date)
+        quarterly_free_cash_flow_future = executor.submit(_fetch, get_quarterly_free_cash_flow_data, stock_symbol, quarterly_free_cash_flow_start_date, end_date)
+        economic_future = executor.submit(_fetch, get_economic_data, start_date, end_date)
+        # One batched download covers the whole watchlist
+        watchlist_future = executor.submit(_fetch, get_stock_data_batch, watchlist, start_date, end_date) if watchlist else None
+        stock_df, stock_error = stock_future.result()
+        dividend_df, dividend_error = dividend_future.result()
+        revenue_df, revenue_error = revenue_future.result()
+        annual_free_cash_flow_df, annual_free_cash_flow_error = annual_free_cash_flow_future.result()
+        quarterly_free_cash_flow_df, quarterly_free_cash_flow_error = quarterly_free_cash_flow_future.result()
+        economic_df, economic_error = economic_future.result()
+        watchlist_data, watchlist_error = watchlist_future.result() if watchlist_future else (None, None)
+
+    # Plot stock data
+    if stock_error:
+        st.error(stock_error)
     if stock_df is not None:
         stock_fig = plot_stock_data(stock_df, stock_symbol)
         if stock_fig is not None:
@@ -816,6 +1095,18 @@ def main():
         else:
             st.warning("No stock plot to display.") # show a warning message
 
+    # Plot the watchlist from its weekly data
+    if watchlist_error:
+        st.error(watchlist_error)
+    if watchlist_data:
+        with st.expander(f"Watchlist ({', '.join(watchlist)})"):
+            for symbol, df in watchlist_data.items():
+                watchlist_fig = plot_stock_data(df, symbol) if df is not None else None
+                if watchlist_fig is not None:
+                    st.plotly_chart(watchlist_fig, use_container_width=True)
+                else:
+                    st.warning(f"No stock plot to display for {symbol}.")
+
     
     # RSI Explanation
     with st.expander("Relative Strength Index (RSI)"):
@@ -828,9 +1119,10 @@ def main():
             else:
                 st.warning("No RSI plot to display.")
     
-    # Fetch and plot dividend data in expander
+    # Plot dividend data in expander
     with st.expander("Dividends"):
-        dividend_df = get_dividend_data(stock_symbol, start_date, end_date)
+        if dividend_error:
+            st.error(dividend_error)
         if dividend_df is not None:
             dividend_fig = plot_dividend_data(dividend_df, stock_symbol)
             if dividend_fig is not None:
@@ -840,10 +1132,10 @@ def main():
         else:
             st.info("Dividend data is not available for this stock within the selected date range.")
 
-    # Fetch and plot revenue data in expander
+    # Plot revenue data in expander
     with st.expander("Quarterly Revenue"):
-        revenue_start_date = datetime(2000, 1, 1)
-        revenue_df = get_revenue_data(stock_symbol, revenue_start_date, end_date)
+        if revenue_error:
+            st.error(revenue_error)
         if revenue_df is not None:
             revenue_fig = plot_revenue_data(revenue_df, stock_symbol)
             if revenue_fig is not None:
@@ -856,8 +1148,8 @@ def main():
     # Add new expander for Annual Free Cash Flow
     with st.expander("Annual Free Cash Flow"):
         st.markdown("Annual Free Cash Flow represents the cash a company has left over after covering its operating expenses and capital expenditures over a year.")
-        # Pass start_date and end_date to the function
-        annual_free_cash_flow_df = get_annual_free_cash_flow_data(stock_symbol, start_date, end_date)
+        if annual_free_cash_flow_error:
+            st.error(annual_free_cash_flow_error)
         if annual_free_cash_flow_df is not None:
             annual_free_cash_flow_fig = plot_annual_free_cash_flow_data(annual_free_cash_flow_df, stock_symbol)
             if annual_free_cash_flow_fig is not None:
@@ -869,8 +1161,8 @@ def main():
 
     # Keep existing expander for Quarterly Free Cash Flow
     with st.expander("Quarterly Free Cash Flow"):
-        quarterly_free_cash_flow_start_date = datetime(2000, 1, 1)
-        quarterly_free_cash_flow_df = get_quarterly_free_cash_flow_data(stock_symbol, quarterly_free_cash_flow_start_date, end_date)
+        if quarterly_free_cash_flow_error:
+            st.error(quarterly_free_cash_flow_error)
         if quarterly_free_cash_flow_df is not None:
             quarterly_free_cash_flow_fig = plot_quarterly_free_cash_flow_data(quarterly_free_cash_flow_df, stock_symbol)
             if quarterly_free_cash_flow_fig is not None:
@@ -881,9 +1173,10 @@ def main():
             st.info("Quarterly free cash flow data is not available for this stock within the selected date range.")
 
 
-    # Fetch and plot economic data in expander
+    # Plot economic data in expander
     with st.expander("Economic Data: GDP and Inflation"): # Updated expander title
-        economic_df = get_economic_data(start_date, end_date)
+        if economic_error:
+            st.error(economic_error)
         if economic_df is not None:
             economic_fig = plot_economic_data(economic_df)
             if economic_fig is not None:
@@ -1,9 +1,21 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import matplotlib.pyplot as plt
+import threading
+import matplotlib
+# Render off-screen with Agg; st.pyplot only needs the PNG, never a GUI window
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import pytz
+from finance_core import get_analysis_data
+from indicators import lttb_indices
+
+# Price charts with more rows than this are downsampled (LTTB) to _DOWNSAMPLED_POINTS
+_MAX_PLOT_POINTS = 2000
+_DOWNSAMPLED_POINTS = 1500
+
+# Cached figures are shared by every session and Matplotlib figures are not thread-safe,
+# so only one of them is saved to PNG (by st.pyplot) at a time
+_FIGURE_LOCK = threading.Lock()
 
 st.set_page_config(layout="wide")
 st.markdown(
@@ -24,32 +36,6 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-def calculate_rsi(data, window=14):
-    """Calculates the Relative Strength Index (RSI)."""
-    delta = data['Close'].diff()
-    up = delta.clip(lower=0)
-    down = -1 * delta.clip(upper=0)
-    average_up = up.rolling(window).mean()
-    average_down = down.rolling(window).mean()
-    rs = average_up / average_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def get_stock_data(ticker, start_date):
-    """Downloads stock data from yfinance and calculates moving averages and RSI."""
-    try:
-        stock_data = yf.download(ticker, start=start_date)
-        if stock_data.empty:
-            st.warning(f"No data found for {ticker} from {start_date}")
-            return None
-        stock_data['50_MA'] = stock_data['Close'].rolling(window=50).mean()
-        stock_data['200_MA'] = stock_data['Close'].rolling(window=200).mean()
-        stock_data['RSI'] = calculate_rsi(stock_data)
-        return stock_data
-    except Exception as e:
-        st.error(f"Error downloading data for {ticker}: {e}")
-        return None
-
 def plot_stock_comparison(data1, ticker1, data2, ticker2, ax):
     """Plots the closing prices of two stocks for comparison on a given axis."""
     if data1 is None or data2 is None:
@@ -64,159 +50,145 @@ def plot_stock_comparison(data1, ticker1, data2, ticker2, ax):
     ax.legend()
     ax.grid(True)
 
+# Figures are mutable and unpicklable, so keep the rendered object itself per (ticker, start_date)
+@st.cache_resource(ttl=3600, show_spinner=False)
+def build_figure(ticker, start_date):
+    """Draws the five analysis subplots and returns the figure."""
+    stock_data, revenue_data, dividends, fcf_data = get_analysis_data(ticker, start_date)
+    # Thin out long histories with LTTB before drawing; the peaks and troughs of Close survive
+    if len(stock_data) > _MAX_PLOT_POINTS:
+        stock_data = stock_data.iloc[lttb_indices(stock_data['Close'].to_numpy(), _DOWNSAMPLED_POINTS)]
+
+    # Use Figure directly so cached figures stay out of pyplot's global figure registry; the
+    # shared date axis is located and formatted once and constrained layout solves in one pass
+    fig = Figure(figsize=(12, 18), layout='constrained')
+    axes = fig.subplots(5, 1, sharex=True)
+
+    # Subplot 1: Price and Moving Averages
+    axes[0].plot(stock_data['Close'], label='Close Price')
+    axes[0].plot(stock_data['50_MA'], label='50-Day MA')
+    axes[0].plot(stock_data['200_MA'], label='200-Day MA')
+    axes[0].set_title(f'{ticker} Price and Moving Averages')
+    axes[0].set_ylabel('Price')
+    axes[0].legend()
+    axes[0].grid(True)
+
+    # Subplot 2: RSI
+    axes[1].plot(stock_data['RSI'], label='RSI', color='purple')
+    axes[1].set_title(f'{ticker} RSI')
+    axes[1].set_ylabel('RSI')
+    axes[1].axhline(70, color='red', linestyle='--', label='Overbought (70)')
+    axes[1].axhline(30, color='green', linestyle='--', label='Oversold (30)')
+    axes[1].legend()
+    axes[1].grid(True)
+
+    # Subplot 3: Revenue (Bar Chart)
+    if not revenue_data.empty:
+        axes[2].bar(revenue_data.index, revenue_data.values, color='green', width=70)
+        axes[2].set_title(f'{ticker} Revenue')
+        axes[2].set_ylabel('Revenue')
+        axes[2].grid(axis='y')
+    else:
+        axes[2].text(0.5, 0.5, "Revenue Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[2].transAxes)
+
+    # Subplot 4: Dividends (Bar Chart)
+    if not dividends.empty:
+        axes[3].bar(dividends.index, dividends.values, color='orange', width=70)
+        axes[3].set_title(f'{ticker} Dividends')
+        axes[3].set_ylabel('Dividend Amount')
+        axes[3].grid(axis='y')
+    else:
+        axes[3].text(0.5, 0.5, "Dividend Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[3].transAxes)
+
+    # Subplot 5: Free Cash Flow (Bar Chart)
+    if not fcf_data.empty:
+        axes[4].bar(fcf_data.index, fcf_data.values, color='blue', width=70)
+        axes[4].set_title(f'{ticker} Free Cash Flow')
+        axes[4].set_ylabel('Free Cash Flow')
+        axes[4].grid(axis='y')
+    else:
+        axes[4].text(0.5, 0.5, "Free Cash Flow Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[4].transAxes)
+
+    axes[-1].set_xlabel('Date')
+    return fig
+
 def analyze_stock(ticker, start_date):
     """
     Analyzes a single stock using yfinance, calculates moving averages and RSI,
     displays data, and generates charts including revenue, dividends, and free cash flow.
-    Returns the Matplotlib figure and stock name.
+    Returns the Matplotlib figure and the price history it was built from.
     """
     try:
-        stock_data = yf.download(ticker, start=start_date)
-
-        if stock_data.empty:
-            st.warning(f"No data found for {ticker} from {start_date}")
-            return None, None
-
-        stock_data['50_MA'] = stock_data['Close'].rolling(window=50).mean()
-        stock_data['200_MA'] = stock_data['Close'].rolling(window=200).mean()
-        stock_data['RSI'] = calculate_rsi(stock_data)
-
-        # Get financial data
-        stock_info = yf.Ticker(ticker)
-        financials = stock_info.financials
-
-        # Get revenue data
-        revenue_data = pd.Series()
-        if financials is not None and 'Total Revenue' in financials.index:
-            revenue_data = financials.loc['Total Revenue']
-            if not revenue_data.empty:
-                if revenue_data.index.tz is None:
-                    revenue_data.index = pd.to_datetime(revenue_data.index).tz_localize('UTC')
-                else:
-                    revenue_data.index = revenue_data.index.tz_convert('UTC')
-                start_date_utc = pd.to_datetime(start_date).tz_localize(pytz.utc)
-                revenue_data = revenue_data[revenue_data.index >= start_date_utc]
-
-        # Get dividend data
-        dividends = pd.Series()
-        if stock_info.dividends is not None:
-            dividends = stock_info.dividends
-            if not dividends.empty:
-                if dividends.index.tz is None:
-                    dividends.index = pd.to_datetime(dividends.index).tz_localize('UTC')
-                else:
-                    dividends.index = dividends.index.tz_convert('UTC')
-                start_date_utc = pd.to_datetime(start_date).tz_localize(pytz.utc)
-                dividends = dividends[dividends.index >= start_date_utc]
-
-        # Get free cash flow data
-        fcf_data = pd.Series()
-        if stock_info.cashflow is not None and 'Free Cash Flow' in stock_info.cashflow.index:
-            fcf_data = stock_info.cashflow.loc['Free Cash Flow']
-            if not fcf_data.empty:
-                if fcf_data.index.tz is None:
-                    fcf_data.index = pd.to_datetime(fcf_data.index).tz_localize('UTC')
-                else:
-                    fcf_data.index = fcf_data.index.tz_convert('UTC')
-                start_date_utc = pd.to_datetime(start_date).tz_localize(pytz.utc)
-                fcf_data = fcf_data[fcf_data.index >= start_date_utc]
-
+        # Raises when the download fails or finds nothing; reported below
+        analysis_data = get_analysis_data(ticker, start_date)
+        stock_data = analysis_data[0]
         latest_data = stock_data[['Close', '50_MA', '200_MA', 'RSI']].tail(1)
         st.subheader(f"Analysis for {ticker} (Last Trading Day, from {start_date}):")
         st.dataframe(latest_data)
+        # The cached fetchers never write to the page, so missing statements are reported here
+        for data_type, data in zip(('Revenue', 'Dividend', 'Free Cash Flow'), analysis_data[1:]):
+            if data.empty:
+                st.info(f"{data_type} Data Not Available for {ticker}")
 
-        fig, axes = plt.subplots(5, 1, figsize=(12, 18))
-
-        # Subplot 1: Price and Moving Averages
-        axes[0].plot(stock_data['Close'], label='Close Price')
-        axes[0].plot(stock_data['50_MA'], label='50-Day MA')
-        axes[0].plot(stock_data['200_MA'], label='200-Day MA')
-        axes[0].set_title(f'{ticker} Price and Moving Averages')
-        axes[0].set_xlabel('Date')
-        axes[0].set_ylabel('Price')
-        axes[0].legend()
-        axes[0].grid(True)
-
-        # Subplot 2: RSI
-        axes[1].plot(stock_data['RSI'], label='RSI', color='purple')
-        axes[1].set_title(f'{ticker} RSI')
-        axes[1].set_xlabel('Date')
-        axes[1].set_ylabel('RSI')
-        axes[1].axhline(70, color='red', linestyle='--', label='Overbought (70)')
-        axes[1].axhline(30, color='green', linestyle='--', label='Oversold (30)')
-        axes[1].legend()
-        axes[1].grid(True)
-
-        # Subplot 3: Revenue (Bar Chart)
-        if not revenue_data.empty:
-            axes[2].bar(revenue_data.index, revenue_data.values, color='green', width=70)
-            axes[2].set_title(f'{ticker} Revenue')
-            axes[2].set_xlabel('Date')
-            axes[2].set_ylabel('Revenue')
-            axes[2].grid(axis='y')
-        else:
-            axes[2].text(0.5, 0.5, "Revenue Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[2].transAxes)
-
-        # Subplot 4: Dividends (Bar Chart)
-        if not dividends.empty:
-            axes[3].bar(dividends.index, dividends.values, color='orange', width=70)
-            axes[3].set_title(f'{ticker} Dividends')
-            axes[3].set_xlabel('Date')
-            axes[3].set_ylabel('Dividend Amount')
-            axes[3].grid(axis='y')
-        else:
-            axes[3].text(0.5, 0.5, "Dividend Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[3].transAxes)
-
-        # Subplot 5: Free Cash Flow (Bar Chart)
-        if not fcf_data.empty:
-            axes[4].bar(fcf_data.index, fcf_data.values, color='blue', width=70)
-            axes[4].set_title(f'{ticker} Free Cash Flow')
-            axes[4].set_xlabel('Date')
-            axes[4].set_ylabel('Free Cash Flow')
-            axes[4].grid(axis='y')
-        else:
-            axes[4].text(0.5, 0.5, "Free Cash Flow Data Not Available", horizontalalignment='center', verticalalignment='center', transform=axes[4].transAxes)
-
-        plt.tight_layout(pad=3.0)
-        return fig, stock_info.info.get('longName', ticker)
+        return build_figure(ticker, start_date), stock_data
 
     except Exception as e:
         st.error(f"An error occurred during analysis of {ticker}: {e}")
         return None, None
 
+def prefetch_analysis(ticker, start_date):
+    """Loads one ticker's analysis data into the cache, without drawing anything."""
+    try:
+        get_analysis_data(ticker, start_date)
+    except Exception:
+        pass # render_analysis asks again on the script thread and reports the error there
+
+def render_analysis(column, ticker, start_date):
+    """Writes one ticker's analysis table and chart into the given column and returns its price history."""
+    with column:
+        fig, stock_data = analyze_stock(ticker, start_date)
+        if fig:
+            with _FIGURE_LOCK:
+                st.pyplot(fig, use_container_width=True)
+    return stock_data
+
+@st.fragment
+def analysis_inputs_sidebar():
+    """Sidebar inputs; editing them reruns only this fragment, so the charts are not re-sent."""
+    st.header("Stock Analysis")
+    ticker1 = st.text_input("Enter first stock ticker:", "AAPL").upper()
+    ticker2 = st.text_input("Enter second stock ticker:", "GOOGL").upper()
+    start_year = st.number_input("Enter start year:", min_value=1900, max_value=datetime.now().year, step=1, value=datetime.now().year - 5)
+    # Store the submitted inputs and rerun the whole page once to draw them; the charts keep
+    # showing the last submission (from the caches) until the button is pressed again
+    if st.button("Analyze Stocks"):
+        st.session_state.analysis_inputs = (ticker1, ticker2, f"{start_year}-01-01")
+        st.rerun()
+
 def main():
     st.title("Finance Enthusiast")
 
     col1, col2 = st.columns(2)
 
     with st.sidebar:
-        st.header("Stock Analysis")
-        ticker1 = st.text_input("Enter first stock ticker:", "AAPL").upper()
-        ticker2 = st.text_input("Enter second stock ticker:", "GOOGL").upper()
-        start_year = st.number_input("Enter start year:", min_value=1900, max_value=datetime.now().year, step=1, value=datetime.now().year - 5)
-        analyze_button = st.button("Analyze Stocks")
-
-    if analyze_button:
-        start_date_str = f"{start_year}-01-01"
-
-        with col1:
-            st.subheader(f"Analysis for {ticker1}")
-            fig1, name1 = analyze_stock(ticker1, start_date_str)
-            if fig1:
-                st.pyplot(fig1, use_container_width=True)
-
-        with col2:
-            st.subheader(f"Analysis for {ticker2}")
-            fig2, name2 = analyze_stock(ticker2, start_date_str)
-            if fig2:
-                st.pyplot(fig2, use_container_width=True)
+        analysis_inputs_sidebar()
+
+    if 'analysis_inputs' in st.session_state:
+        ticker1, ticker2, start_date_str = st.session_state.analysis_inputs
+
+        # Both analyses are network-bound, so fetch them side by side. The workers only load
+        # the data; every table, message and chart is written afterwards on the script thread.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(prefetch_analysis, (ticker1, ticker2), (start_date_str, start_date_str)))
+        # The comparison chart below reuses the frames the analyses already loaded
+        data1 = render_analysis(col1, ticker1, start_date_str)
+        data2 = render_analysis(col2, ticker2, start_date_str)
 
         # Optional: Display comparison chart below the columns
-        data1 = get_stock_data(ticker1, start_date_str)
-        data2 = get_stock_data(ticker2, start_date_str)
         if data1 is not None and data2 is not None:
             st.subheader("Comparison of Closing Prices")
-            fig_compare, ax_compare = plt.subplots(figsize=(12, 6))
+            fig_compare = Figure(figsize=(12, 6))
+            ax_compare = fig_compare.subplots()
             plot_stock_comparison(data1, ticker1, data2, ticker2, ax_compare)
             st.pyplot(fig_compare, use_container_width=True)
 
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+
+def moving_averages(values, windows):
+    """
+    Computes simple moving averages for several window sizes in one pass.
+
+    A single cumulative sum of the series is shared by every window, so each
+    extra window costs one vectorized subtraction instead of another rolling
+    walk over the data. Windows containing a NaN yield NaN, matching pandas'
+    rolling(window).mean().
+
+    Args:
+        values (numpy.ndarray): The series to average (e.g. closing prices).
+        windows (tuple): The window sizes to compute.
+
+    Returns:
+        list: One numpy.ndarray per window, aligned with values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    averages = []
+    for window in windows:
+        average = np.full(values.shape, np.nan)
+        if len(values) >= window:
+            window_sums = sums[window:] - sums[:-window]
+            complete = (counts[window:] - counts[:-window]) == window
+            average[window - 1:] = np.where(complete, window_sums / window, np.nan)
+        averages.append(average)
+    return averages
+
+
+def rsi(close, period=14):
+    """
+    Computes the Relative Strength Index with Wilder's smoothing.
+
+    Wilder's average (avg = (avg * (n - 1) + x) / n) is an exponential mean with
+    alpha = 1 / n, so pandas' C-level ewm runs the recursion in a single pass.
+
+    Args:
+        close (numpy.ndarray): Closing prices.
+        period (int): The RSI look-back period.
+
+    Returns:
+        numpy.ndarray: RSI values (NaN until `period` price changes are available, and
+                       50 while the price hasn't moved at all).
+    """
+    # Split the price changes into gains and losses on the raw array, then smooth
+    # both columns in one ewm pass instead of building a Series per step
+    delta = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+    changes = pd.DataFrame({'gain': np.maximum(delta, 0), 'loss': -np.minimum(delta, 0)})
+    averages = changes.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    gain, loss = averages[:, 0], averages[:, 1]
+    # Same as 100 - 100 / (1 + gain / loss), which is 100 only when there are gains and no
+    # losses. A flat price (no gains or losses) gets a neutral 50 instead of 100.
+    total = gain + loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total == 0, 50.0, 100 * gain / total)
+
+
+def lttb_indices(values, n_out):
+    """
+    Picks the rows to keep when downsampling a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The rest are split into n_out - 2
+    buckets, and from each bucket the point forming the largest triangle with the
+    previously kept point and the next bucket's average is chosen, so peaks and
+    troughs survive the downsampling.
+
+    Args:
+        values (numpy.ndarray): The series to downsample (e.g. closing prices).
+        n_out (int): Number of points to keep.
+
+    Returns:
+        numpy.ndarray: Sorted integer positions of the rows to keep.
+    """
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        average_x = (end + next_end - 1) / 2
+        average_y = y[end:next_end].mean()
+        candidates = np.arange(start, end)
+        areas = np.abs((previous - average_x) * (y[start:end] - y[previous])
+                       - (previous - candidates) * (average_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
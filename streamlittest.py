@@ -1,39 +1,136 @@
 import streamlit as st
-import google.generativeai as genai
 import os
-from dotenv import load_dotenv
-import yfinance as yf # Import yfinance library
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from ui_common import greeting_row
+
+# Set page configuration at the very beginning, before any other Streamlit command
+# (the API key check in get_gemini_model included)
+st.set_page_config(page_title="Gemini Chatbot with Layout", layout="centered")
 
 # --- Configuration ---
-# Load environment variables from a .env file (recommended for API keys)
-# Make sure you have a .env file in the same directory as app.py with:
-# GEMINI_API_KEY="YOUR_API_KEY_HERE"
-load_dotenv()
-
-# Get the Gemini API key from environment variables
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
-    st.error("Gemini API key not found. Please set the GEMINI_API_KEY environment variable in a .env file.")
-    st.stop() # Stop the app if the key is missing
-
-# Configure the google.generativeai library with your API key
-genai.configure(api_key=GEMINI_API_KEY)
+# Number of past messages (user and model) sent to Gemini with each prompt.
+# Keep it even so the window always starts on a user message.
+STM_WINDOW = 20
+# Number of messages drawn in the chat box; older ones are loaded on request
+RENDER_WINDOW = 30
+# Messages longer than this show their beginning, with the rest in a collapsed expander
+MAX_RENDERED_CHARS = 4000
+# Messages kept per session; the oldest are dropped beyond this
+MAX_HISTORY = 500
+# Chat histories are saved here so they survive reloads and server restarts
+SESSION_DIR = os.path.join("data", "sessions")
+# Saved sessions untouched for this long are deleted (checked every 15 minutes)
+SESSION_IDLE_TTL = 24 * 3600
+SESSION_CLEANUP_INTERVAL = 15 * 60
+
+# Configure the SDK and build the model once per process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def get_gemini_model():
+    # The SDK and dotenv are imported here, so only the first run pays for them
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+
+    # Load environment variables from a .env file (recommended for API keys)
+    # Make sure you have a .env file in the same directory as app.py with:
+    # GEMINI_API_KEY="YOUR_API_KEY_HERE"
+    load_dotenv()
+
+    # Get the Gemini API key from environment variables
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+
+    if not gemini_api_key:
+        st.error("Gemini API key not found. Please set the GEMINI_API_KEY environment variable in a .env file.")
+        st.stop() # Stop the app if the key is missing (nothing is cached, so the next run checks again)
+
+    # Configure the google.generativeai library with your API key
+    genai.configure(api_key=gemini_api_key)
+
+    # Initialize the Gemini model
+    # CHANGED: Now using 'gemini-1.5-flash'
+    # This model is optimized for speed and efficiency, suitable for high-volume, low-latency tasks.
+    return genai.GenerativeModel('gemini-1.5-flash')
+
+# --- Session Persistence ---
+def session_path(session_id):
+    return os.path.join(SESSION_DIR, f"{session_id}.json")
+
+def load_messages(session_id):
+    # Returns the saved messages for this session, or None if there are none
+    try:
+        with open(session_path(session_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_messages(session_id, messages):
+    try:
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        # Write to a temp file first so a crash never leaves half a session behind
+        tmp_path = f"{session_path(session_id)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(messages), f)
+        os.replace(tmp_path, session_path(session_id))
+    except OSError as e:
+        logging.warning("Could not save chat session %s: %s", session_id, e)
+
+# Turns the last STM_WINDOW saved messages into Gemini chat history, so a restored
+# session continues the conversation the user sees
+def gemini_history(messages):
+    recent = list(islice(messages, max(len(messages) - STM_WINDOW, 0), None))
+    # The history has to start on a user turn, and Gemini calls the assistant "model"
+    while recent and recent[0]["role"] != "user":
+        recent.pop(0)
+    return [{"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]} for m in recent]
+
+# Button callback that draws RENDER_WINDOW more of the older chat messages
+def show_earlier_messages():
+    st.session_state.render_window += RENDER_WINDOW
+
+# Start one background thread per process that deletes idle session files
+@st.cache_resource(show_spinner=False)
+def start_session_cleanup():
+    def cleanup():
+        while True:
+            cutoff = time.time() - SESSION_IDLE_TTL
+            try:
+                for entry in os.scandir(SESSION_DIR):
+                    if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+            except OSError:
+                pass # Directory not created yet, or a file vanished mid-scan
+            time.sleep(SESSION_CLEANUP_INTERVAL)
 
-# Initialize the Gemini model
-# CHANGED: Now using 'gemini-1.5-flash'
-# This model is optimized for speed and efficiency, suitable for high-volume, low-latency tasks.
-model = genai.GenerativeModel('gemini-1.5-flash')
+    thread = threading.Thread(target=cleanup, name="session-cleanup", daemon=True)
+    thread.start()
+    return thread
 
 # --- Streamlit App UI ---
-# Set page configuration at the very beginning
-st.set_page_config(page_title="Gemini Chatbot with Layout", layout="centered")
-
 # --- Session State Initialization ---
-# Initialize chat history in session state if it doesn't exist
+start_session_cleanup()
+
+# The session id lives in the URL, so a reload (or a server restart) finds the saved chat again
+if "session_id" not in st.session_state:
+    session_id = st.query_params.get("sid", "")
+    if not re.fullmatch(r"[0-9a-f]{32}", session_id): # Only accept ids we could have generated
+        session_id = uuid.uuid4().hex
+    st.session_state.session_id = session_id
+    st.query_params["sid"] = session_id
+
+# Initialize chat history in session state if it doesn't exist, restoring a saved one if present
 if "messages" not in st.session_state:
-    st.session_state.messages = []
-    st.session_state.messages.append({"role": "assistant", "content": "Hello! How can I help you today?"})
+    # A bounded deque drops the oldest messages on its own once MAX_HISTORY is reached
+    st.session_state.messages = deque(load_messages(st.session_state.session_id) or [], maxlen=MAX_HISTORY)
+    if not st.session_state.messages:
+        st.session_state.messages.append({"role": "assistant", "content": "Hello! How can I help you today?"})
+if "render_window" not in st.session_state:
+    st.session_state.render_window = RENDER_WINDOW
 
 # Initialize stock data in session state
 if "stock_data" not in st.session_state:
@@ -45,18 +142,8 @@ if "current_ticker" not in st.session_state:
 st.title("Streamlit Layout Test with Sidebar")
 st.write("This is a simple layout test to demonstrate Streamlit columns and a sidebar.")
 
-# Divide body into 3 columns
-col1, col2, col3 = st.columns(3)
-
-# Place content in each column
-with col1:
-    st.write("i love you")
-
-with col2:
-    st.write("what???")
-
-with col3:
-    st.write("I love you dearly")
+# Divide body into 3 columns (shared fragment, see ui_common.py)
+greeting_row()
 
 st.markdown("---") # Separator
 
@@ -71,6 +158,7 @@ if st.button("Fetch Stock Data", key="fetch_stock_data_button"):
         st.session_state.current_ticker = ticker_input.upper()
         try:
             # Fetch historical data for the last 30 days
+            import yfinance as yf # Imported on first use, it's only needed when fetching
             ticker = yf.Ticker(st.session_state.current_ticker)
             hist = ticker.history(period="30d")
             if not hist.empty:
@@ -95,17 +183,41 @@ st.markdown("---") # Separator
 
 # --- Chatbot in Sidebar ---
 # Streamlit only supports one sidebar, which is on the left
-with st.sidebar:
+# The chatbot is a fragment, so a chat turn reruns only the sidebar, not the whole page
+@st.fragment
+def chatbot_sidebar():
     st.title("🤖 Gemini-Powered Chatbot")
     st.markdown("Ask me anything! I'm powered by Google's Gemini AI. This simple bot remembers your current conversation.")
     st.markdown("If you've fetched stock data, I can answer questions about it!")
 
+    model = get_gemini_model()
+    # Keep one ChatSession per browser session, so the SDK holds the conversation
+    # instead of us rebuilding and resending the whole history every turn
+    if "chat" not in st.session_state:
+        st.session_state.chat = model.start_chat(history=gemini_history(st.session_state.messages))
+
     # Display previous messages from chat history
     # Use a container to make the chat messages scrollable if they get too long
     chat_container = st.container(height=400, border=True) # Fixed height for scrollability in sidebar
-    for message in st.session_state.messages:
+    # Only the last render_window messages are drawn, so long chats don't redraw everything each rerun
+    hidden_messages = len(st.session_state.messages) - st.session_state.render_window
+    if hidden_messages > 0:
+        # The callback widens the window before the fragment reruns, so no extra rerun is needed
+        chat_container.button(f"Load {min(hidden_messages, RENDER_WINDOW)} earlier messages", key="load_earlier_button",
+                              on_click=show_earlier_messages)
+    for message in islice(st.session_state.messages, max(hidden_messages, 0), None):
         with chat_container.chat_message(message["role"]):
-            st.markdown(message["content"])
+            content = message["content"]
+            if len(content) > MAX_RENDERED_CHARS:
+                # Cut at a line break where possible so markdown blocks aren't split mid-line
+                cut = content.rfind("\n", 0, MAX_RENDERED_CHARS)
+                if cut <= 0:
+                    cut = MAX_RENDERED_CHARS
+                st.markdown(content[:cut] + " …")
+                with st.expander("Show full"):
+                    st.markdown(content[cut:])
+            else:
+                st.markdown(content)
 
     # --- Chat Input and Response Logic ---
     # Get user input from the chat input box
@@ -113,6 +225,7 @@ with st.sidebar:
     if prompt := st.chat_input("What's on your mind?", key="sidebar_chat_input"):
         # Add user message to chat history
         st.session_state.messages.append({"role": "user", "content": prompt})
+        save_messages(st.session_state.session_id, st.session_state.messages)
         with chat_container.chat_message("user"): # Display in the chat container
             st.markdown(prompt)
 
@@ -125,50 +238,55 @@ with st.sidebar:
             st.info(f"Using stock data for {st.session_state.current_ticker} as context.")
 
         # Generate response from Gemini
-        with st.spinner("Thinking..."): # Show a spinner while waiting for AI response
-            try:
-                # The Gemini models can handle chat, but their 'history' expectation
-                # can sometimes be slightly different for text-only turns.
-                # It's generally safest to explicitly send parts with 'text' key.
-                chat_history_for_gemini = []
-                for msg in st.session_state.messages:
-                    gemini_role = "user" if msg["role"] == "user" else "model"
-                    chat_history_for_gemini.append({"role": gemini_role, "parts": [{"text": msg["content"]}]})
-
-                # Prepend stock context to the current user prompt if available
-                current_prompt_with_context = stock_context + prompt
-
-                # --- NEW ADDITION FOR TESTING ---
-                # Print the full prompt being sent to the Gemini API
-                print(f"\n--- Sending to Gemini ---\n{current_prompt_with_context}\n--------------------------\n")
-                # --- END NEW ADDITION ---
-
-                # Start a chat session with the history
-                # Exclude the current user prompt (which now includes context) from initial history passed to start_chat
-                # as it will be sent separately by chat.send_message()
-                chat = model.start_chat(history=chat_history_for_gemini[:-1])
-
-                # Send the current user prompt with context
-                response = chat.send_message(current_prompt_with_context)
-
-                # Access the text from the response
-                gemini_response_text = response.text
-
-                # Add Gemini's response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": gemini_response_text})
-                with chat_container.chat_message("assistant"): # Display in the chat container
-                    st.markdown(gemini_response_text)
-
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-                st.warning("Please try again or check your API key and network connection.")
+        response = None
+        try:
+            # Prepend stock context to the current user prompt if available
+            current_prompt_with_context = stock_context + prompt
+
+            # --- NEW ADDITION FOR TESTING ---
+            # Print the full prompt being sent to the Gemini API
+            print(f"\n--- Sending to Gemini ---\n{current_prompt_with_context}\n--------------------------\n")
+            # --- END NEW ADDITION ---
+
+            # Only the most recent STM_WINDOW messages are sent back to Gemini, so the
+            # prompt size stops growing with the conversation (the screen keeps them all)
+            chat = st.session_state.chat
+            if len(chat.history) > STM_WINDOW:
+                chat.history = chat.history[-STM_WINDOW:]
+
+            # Send the current user prompt with context on the persistent chat session,
+            # which already holds the earlier turns. The reply is streamed, so it shows up
+            # as it is generated instead of all at once after a spinner.
+            response = chat.send_message(current_prompt_with_context, stream=True)
+            with chat_container.chat_message("assistant"): # Display in the chat container
+                gemini_response_text = st.write_stream(chunk.text for chunk in response)
+
+            # Add Gemini's response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": gemini_response_text})
+            save_messages(st.session_state.session_id, st.session_state.messages)
+
+        except Exception as e:
+            # Drop the failed turn: a blocked or cut-off stream leaves its broken reply in the
+            # ChatSession, and every later chat.history access would raise until Clear Chat
+            if response is not None:
+                st.session_state.chat.rewind()
+            st.session_state.messages.pop() # The user message that got no answer
+            save_messages(st.session_state.session_id, st.session_state.messages)
+            st.error(f"An error occurred: {e}")
+            st.warning("Please try again or check your API key and network connection.")
 
     # Optional: Clear chat history button
     st.markdown("---") # Separator
     # Using a unique key for the clear chat button in the sidebar
     if st.button("Clear Chat", key="clear_chat_button"):
-        st.session_state.messages = []
+        st.session_state.messages = deque(maxlen=MAX_HISTORY)
         st.session_state.messages.append({"role": "assistant", "content": "Chat history cleared. How can I help you now?"})
+        save_messages(st.session_state.session_id, st.session_state.messages)
+        st.session_state.chat = model.start_chat(history=[]) # Start a fresh chat session too
+        st.session_state.render_window = RENDER_WINDOW
         st.session_state.stock_data = None # Also clear stock data
         st.session_state.current_ticker = "" # Also clear current ticker
-        st.rerun() # Rerun the app to clear the displayed messages
+        st.rerun() # Rerun the whole app, since the stock data on the main page was cleared too
+
+with st.sidebar:
+    chatbot_sidebar()
@@ -0,0 +1,21 @@
+import streamlit as st
+
+
+@st.fragment
+def greeting_row():
+    """
+    Renders the row of three greeting columns used by the layout test page.
+
+    The content is static, so it runs as a fragment with its own rerun scope.
+    """
+    col1, col2, col3 = st.columns(3)
+
+    # Place content in each column
+    with col1:
+        st.write("i love you")
+
+    with col2:
+        st.write("what???")
+
+    with col3:
+        st.write("I love you dearly")